@@ -27,9 +27,9 @@
 #                                 #
 ###################################
 
-from time import sleep
+from time import sleep, monotonic, time
 from PySide6.QtCore import (
-  QStandardPaths, QTimer, Qt,
+  QFileSystemWatcher, QObject, QProcess, QRunnable, QSocketNotifier, QStandardPaths, QThreadPool, QTimer, Qt, Signal,
 )
 from PySide6.QtGui import (
   QAction, QBrush, QColor, QDesktopServices,
@@ -45,9 +45,23 @@ import os
 import sys
 import json
 import signal
+import errno
+import socket
+import struct
 import shutil
 import textwrap
+import functools
+import threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
 from subprocess import check_call, check_output, STDOUT, CalledProcessError
+try:
+  # orjson is optional, it parses bytes directly and is a lot faster
+  from orjson import loads as json_loads, dumps as json_dumps
+except ImportError:
+  from json import loads as json_loads
+  def json_dumps(obj) -> bytes:
+    return json.dumps(obj).encode()
 
 APP_ID = "zerotier-qt"
 APP_NAME = "ZeroTier-Qt"
@@ -58,84 +72,209 @@ CONFIG_DIR = os.path.join(
   str(QStandardPaths.standardLocations(QStandardPaths.StandardLocation.GenericConfigLocation)[0]),
   APP_ID
 )
+CACHE_DIR = os.path.join(
+  str(QStandardPaths.standardLocations(QStandardPaths.StandardLocation.GenericCacheLocation)[0]),
+  APP_ID
+)
 AUTH_FILE = os.path.join(CONFIG_DIR, "authtoken.secret")
+STATE_FILE = os.path.join(CACHE_DIR, "state.json")
+# Snapshots older than this are not worth showing
+STATE_MAX_AGE = 60
+PORT_FILE = "/var/lib/zerotier-one/zerotier-one.port"
+DEFAULT_PORT = 9993
+# rtnetlink multicast groups, see <linux/rtnetlink.h>
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+RTM_NEWLINK, RTM_DELLINK, RTM_NEWADDR, RTM_DELADDR = 16, 17, 20, 21
+IFLA_IFNAME = 3
 authtoken = None
+tokenWatcher = None
 
 # ============ CONTROLLER ==================
+_cached_getters = []
+
+def ttl_cache(seconds: float = 0.5):
+  """Memoize a getter for `seconds`, so one UI refresh spawns each command once."""
+  def decorator(func):
+    cache = {}
+    @functools.wraps(func)
+    def wrapper(*args):
+      now = monotonic()
+      if args in cache:
+        value, expiry = cache[args]
+        if now < expiry:
+          return value
+      value = func(*args)
+      cache[args] = (value, now + seconds)
+      return value
+    wrapper.cache_clear = cache.clear # pyright: ignore[reportAttributeAccessIssue]
+    _cached_getters.append(wrapper)
+    return wrapper
+  return decorator
+
+def cache_clear():
+  """Drop every cached getter result, call it after changing ZeroTier state."""
+  for getter in _cached_getters:
+    getter.cache_clear()
+
 # TODO: Add a button to update authtoken.secret
+def get_token_file() -> str:
+  if os.getuid() == 0:
+    return "/var/lib/zerotier-one/authtoken.secret"
+  homeToken = os.path.join(HOME_DIR, ".zeroTierOneAuthToken")
+  if os.path.isfile(homeToken):
+    return homeToken
+  return AUTH_FILE
+
 def get_token() -> str:
   global authtoken
-  if authtoken is not None:
-    return authtoken
-  if os.getuid() == 0:
-    authtoken = open("/var/lib/zerotier-one/authtoken.secret").read().strip()
-    return authtoken
-  else:
-    if os.path.isfile(".zeroTierOneAuthToken"):
-      authtoken = open(os.path.join(HOME_DIR, ".zeroTierOneAuthToken")).read().strip()
-      return authtoken
-    authtoken = open(AUTH_FILE).read().strip()
-    return authtoken
+  if authtoken is None:
+    authtoken = open(get_token_file()).read().strip()
+  return authtoken
 
+def forget_token(path: str):
+  global authtoken
+  authtoken = None
+  # Replacing the file (e.g. with cp) removes it from the watcher
+  if tokenWatcher is not None and os.path.isfile(path) and path not in tokenWatcher.files():
+    tokenWatcher.addPath(path)
+
+def watch_token():
+  global tokenWatcher
+  tokenWatcher = QFileSystemWatcher([get_token_file()])
+  tokenWatcher.fileChanged.connect(forget_token)
+
+class ZeroTierError(Exception):
+  def __init__(self, status, message: str):
+    super().__init__(f"{status} {message}" if status else message)
+    self.status = status
+    self.message = message
+
+class ZtClient:
+  """Client for the zerotier-one local HTTP API.
+
+  Keeps a keep-alive connection per thread instead of spawning zerotier-cli
+  per call, so requests from different workers can run at the same time.
+  """
+  def __init__(self, host: str = "127.0.0.1"):
+    self.host = host
+    self.local = threading.local()
+
+  @staticmethod
+  def get_port() -> int:
+    try:
+      return int(open(PORT_FILE).read().strip())
+    except (OSError, ValueError):
+      return DEFAULT_PORT
+
+  def request(self, method: str, path: str, body=None):
+    headers = {"X-ZT1-Auth": get_token()}
+    payload = None
+    if body is not None:
+      payload = json_dumps(body)
+      headers["Content-Type"] = "application/json"
+    # The service may have dropped the idle connection, so retry once
+    for attempt in range(2):
+      connection = getattr(self.local, "connection", None)
+      if connection is None:
+        connection = http.client.HTTPConnection(self.host, self.get_port(), timeout=10)
+        self.local.connection = connection
+      try:
+        connection.request(method, path, payload, headers)
+        response = connection.getresponse()
+        data = response.read()
+      except (http.client.HTTPException, OSError) as error:
+        connection.close()
+        self.local.connection = None
+        if attempt:
+          raise ZeroTierError(None, str(error)) from error
+        continue
+      if response.status != 200:
+        raise ZeroTierError(response.status, data.decode().strip())
+      return json_loads(data) if data else None
+
+  def status(self) -> dict:
+    return self.request("GET", "/status")
+
+  def networks(self) -> list:
+    return self.request("GET", "/network")
+
+  def peers(self) -> list:
+    return self.request("GET", "/peer")
+
+  def join(self, network_id: str):
+    return self.request("POST", f"/network/{network_id}", {})
+
+  def leave(self, network_id: str):
+    return self.request("DELETE", f"/network/{network_id}")
+
+  def set(self, network_id: str, **config):
+    return self.request("POST", f"/network/{network_id}", config)
+
+ztclient = ZtClient()
+
+@ttl_cache()
 def get_status():
-  status = check_output(["zerotier-cli", f"-T{get_token()}", "status"]).decode()
-  status = status.split()
-  return status
+  return ztclient.status()
 
-def manage_service(action: str) -> bool:
+def get_online_status(status: dict) -> str:
+  # Same wording as `zerotier-cli status`
+  if status.get("tcpFallbackActive"):
+    return "TUNNELED"
+  return "ONLINE" if status["online"] else "OFFLINE"
+
+def systemctl(action: str):
   try:
     check_output(["systemctl", action, "zerotier-one"], stderr=STDOUT)
+  finally:
+    cache_clear()
+
+def service_error(message: str):
+  QMessageBox.warning(None, "Error", f'Something went wrong: "{message}"')
+
+def manage_service(action: str) -> bool:
+  try:
+    systemctl(action)
     return True
   except CalledProcessError as error:
-    QMessageBox.warning(
-      None,
-      "Error",
-      f'Something went wrong: "{error.stderr.decode().strip()}"'
-    )
+    service_error(error.output.decode().strip())
     return False
 
+def set_config(network_id: str, config: str, value):
+  ztclient.set(network_id, **{config: bool(value)})
+  cache_clear()
+
 def change_config(network_id: str, config: str, value):
-  # zerotier-cli only accepts int values
-  value = int(value)
-  try:
-    check_output(
-      ["zerotier-cli", f"-T{get_token()}", "set", network_id, f"{config}={value}",],
-      stderr=STDOUT,
-    )
-  except CalledProcessError as error:
-    error = error.output.decode().strip()
-    QMessageBox.warning(
+  run_async(
+    set_config, lambda _: None, network_id, config, value,
+    on_fail=lambda message: QMessageBox.warning(
       None,
       "Failed to change config",
-      f'Error: "{error}"'
+      f'Error: "{message}"'
     )
+  )
+
+@ttl_cache()
+def get_network_ids() -> frozenset[str]:
+  return frozenset(network["nwid"] for network in get_networks_info())
 
 def is_on_network(network_id):
-  currently_joined = False
-  for network in get_networks_info():
-    if currently_joined:
-      break
-    currently_joined = network["nwid"] == network_id
-  return currently_joined
+  return network_id in get_network_ids()
 
-def join_network(network_id):
-  try:
-    if is_on_network(network_id):
-      QMessageBox.information(
-        None,
-        QApplication.applicationDisplayName(),
-        "You are already a member of this network.",
-      )
-      return False
-    check_call(["zerotier-cli", f"-T{get_token()}", "join", network_id])
-    return True
-  except CalledProcessError:
-    QMessageBox.warning(
-      None,
-      QApplication.applicationDisplayName(),
-      "Invalid network ID",
-    )
+def join_network(network_id) -> bool:
+  # False if we are already a member
+  if is_on_network(network_id):
     return False
+  ztclient.join(network_id)
+  cache_clear()
+  return True
+
+def is_network_settled(network_id) -> bool:
+  return any(
+    network["nwid"] == network_id and network["status"] != "REQUESTING_CONFIGURATION"
+    for network in get_networks_info()
+  )
 
 def get_network_name_by_id(network_id):
   networks = get_networks_info()
@@ -144,65 +283,126 @@ def get_network_name_by_id(network_id):
       return network["name"]
 
 # TODO: describe data structure
+@ttl_cache()
 def get_networks_info():
-  return json.loads(check_output(["zerotier-cli", f"-T{get_token()}", "-j", "listnetworks"]))
+  return ztclient.networks()
 
+@ttl_cache()
 def get_peers_info():
-  return json.loads(check_output(["zerotier-cli", f"-T{get_token()}", "-j", "peers"]))
+  return ztclient.peers()
+
+@ttl_cache()
+def get_peers_by_address() -> dict[str, dict]:
+  return {peer["address"]: peer for peer in get_peers_info()}
+
+@ttl_cache()
+def get_all_interface_states() -> dict[str, str]:
+  interfaceInfo = json_loads(check_output(["ip", "--json", "address"]))
+  return {info["ifname"]: info["operstate"] for info in interfaceInfo}
 
 def get_interface_state(interface):
-  interfaceInfo = json.loads(check_output(["ip", "--json", "address"]).decode())
-  for info in interfaceInfo:
-    if info["ifname"] == interface:
-      state = info["operstate"]
+  # Reading sysfs is a plain file read, `ip` is only needed where it's missing
+  try:
+    with open(f"/sys/class/net/{interface}/operstate") as operstate:
+      return operstate.read().strip().upper()
+  except FileNotFoundError:
+    # The device may have been torn down in the meantime
+    return get_all_interface_states().get(interface, "UNKNOWN")
+
+def open_link_monitor() -> socket.socket | None:
+  """Subscribe to kernel interface and address changes.
+
+  Returns None where rtnetlink isn't available.
+  """
+  try:
+    sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+    sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+  except (AttributeError, OSError):
+    return None
+  sock.setblocking(False)
+  return sock
+
+def parse_link_events(data: bytes) -> set[str]:
+  """Names of the interfaces a batch of rtnetlink messages is about."""
+  names = set()
+  offset = 0
+  while offset + 16 <= len(data):
+    # struct nlmsghdr
+    length, msgType = struct.unpack_from("=IH", data, offset)
+    if length < 16:
       break
-  return state # pyright: ignore
-
-def leave_network(networkId, networkName=None):
-  answer = QMessageBox.question(
-    None,
-    "Leave Network",
-    f"Are you sure you want to "
-    f'leave "{networkName}"\n(ID: {networkId})?',
-  )
-  if answer == QMessageBox.StandardButton.Yes:
+    payload = offset + 16
+    if msgType in (RTM_NEWLINK, RTM_DELLINK):
+      # struct ifinfomsg is followed by rtattrs, one of them is the name.
+      # Read it from the message, a deleted link has no index to look up.
+      attr = payload + 16
+      while attr + 4 <= offset + length:
+        attrLength, attrType = struct.unpack_from("=HH", data, attr)
+        if attrLength < 4:
+          break
+        if attrType == IFLA_IFNAME:
+          names.add(data[attr + 4:attr + attrLength].split(b"\0", 1)[0].decode())
+          break
+        attr += (attrLength + 3) & ~3
+    elif msgType in (RTM_NEWADDR, RTM_DELADDR):
+      # struct ifaddrmsg, the interface index is its last field
+      index, = struct.unpack_from("=I", data, payload + 4)
+      try:
+        names.add(socket.if_indextoname(index))
+      except OSError:
+        pass # already gone, its link event covers it
+    offset += (length + 3) & ~3
+  return names
+
+def read_link_events(sock: socket.socket) -> set[str] | None:
+  """Drain the monitor and return the interfaces that changed.
+
+  None means events were lost, so anything may have changed.
+  """
+  names = set()
+  lost = False
+  while True:
     try:
-      check_call(["zerotier-cli", f"-T{get_token()}", "leave", networkId])
-      return True
-    except CalledProcessError:
-      QMessageBox.warning(
-        None,
-        QApplication.applicationDisplayName(),
-        "Failed to leave network.",
-      )
-      return False
-  else:
-    return False
+      data = sock.recv(65536)
+    except BlockingIOError:
+      break
+    except OSError as error:
+      # ENOBUFS: the kernel dropped events because we fell behind,
+      # the socket is still usable so keep draining
+      lost = True
+      if error.errno == errno.ENOBUFS:
+        continue
+      break
+    if not data:
+      break
+    names |= parse_link_events(data)
+  return None if lost else names
+
+def leave_network(networkId):
+  ztclient.leave(networkId)
+  cache_clear()
 
 def toggle_interface(interfaceName):
   state = get_interface_state(interfaceName)
 
   if state.lower() == "down":
-    try:
-      check_call(
-        ["pkexec", "ip", "link", "set", interfaceName, "up"]
-      )
-      return True
-    except CalledProcessError:
-      return False
+    check_call(
+      ["pkexec", "ip", "link", "set", interfaceName, "up"]
+    )
   else:
-    try:
-      check_call(
-        ["pkexec", "ip", "link", "set", interfaceName, "down"]
-      )
-      return True
-    except CalledProcessError:
-      return False
+    check_call(
+      ["pkexec", "ip", "link", "set", interfaceName, "down"]
+    )
+  cache_clear()
 
+SERVICE_STATUS_CMD = ["systemctl", "show", "zerotier-one", "--property=ActiveState,UnitFileState"]
+
+@ttl_cache()
 def get_service_status():
-  data = check_output(
-    ["systemctl", "show", "zerotier-one", "--property=ActiveState,UnitFileState"], universal_newlines=True
-  ).split("\n")
+  return parse_service_status(check_output(SERVICE_STATUS_CMD, universal_newlines=True))
+
+def parse_service_status(output: str) -> dict[str, str]:
+  data = output.split("\n")
   formatted_data = {}
   for entry in data:
     key_value = entry.split("=", 1)
@@ -211,46 +411,52 @@ def get_service_status():
 
   return formatted_data
 
+_NO_AUTHTOKEN_MSG = textwrap.dedent(
+  """\
+  No authtoken.secret file has been found in
+  "/var/lib/zerotier-one". This usually means you
+  never started the zerotier-one service.
+  Do you wish to start it now?
+  """
+)
+_MISSING_LOCAL_TOKEN_TMPL = textwrap.dedent(
+  """\
+  This user doesn't have ZeroTier-One Authtoken file.
+  Choosing «Yes» will ask you for password to
+  copy the authtoken.secret from
+  /var/lib/zerotier-one/
+  to
+  {config_dir}
+
+  «No» will exit the program.
+  """
+)
+
 def setup_authtoken():
   if not os.path.isfile("/var/lib/zerotier-one/authtoken.secret"):
     allowed_to_start_service = QMessageBox.question(
       None,
       "No authtoken found",
-      textwrap.dedent(
-        """\
-        No authtoken.secret file has been found in
-        "/var/lib/zerotier-one". This usually means you
-        never started the zerotier-one service.
-        Do you wish to start it now?
-        """
-      )
+      _NO_AUTHTOKEN_MSG,
     )
     if allowed_to_start_service == QMessageBox.StandardButton.Yes:
       manage_service("start")
     else:
       os._exit(0)
-  if os.getuid() == 0:
-    return
-  if not os.path.isfile(AUTH_FILE):
+  if os.getuid() != 0 and not os.path.isfile(AUTH_FILE):
     os.makedirs(CONFIG_DIR, exist_ok=True)
     answer = QMessageBox.question(
       None,
       "Missing Local Authtoken",
-      textwrap.dedent(f"""\
-        This user doesn't have ZeroTier-One Authtoken file.
-        Choosing «Yes» will ask you for password to
-        copy the authtoken.secret from
-        /var/lib/zerotier-one/
-        to
-        {CONFIG_DIR}
-
-        «No» will exit the program.
-        """),
+      _MISSING_LOCAL_TOKEN_TMPL.format(config_dir=CONFIG_DIR),
     )
     if answer == QMessageBox.StandardButton.Yes:
       import_authtoken()
     else:
       os._exit(1)
+  # Read the token once, it's only read again if the file changes
+  get_token()
+  watch_token()
 
 def import_authtoken():
   try:
@@ -272,13 +478,129 @@ def import_authtoken():
     os._exit(1)
   return
 
+# ============ WORKERS =====================
+class CliWorker(QRunnable):
+  """Runs a blocking controller function on the global thread pool."""
+  class Signals(QObject):
+    finished = Signal(object)
+    failed = Signal(str)
+
+  def __init__(self, func, *args):
+    super().__init__()
+    self.func = func
+    self.args = args
+    self.signals = CliWorker.Signals()
+
+  def run(self):
+    try:
+      result = self.func(*self.args)
+    # Report every failure, otherwise the caller would never hear back
+    except Exception as error:
+      self.signals.failed.emit(str(error))
+    else:
+      self.signals.finished.emit(result)
+
+# Workers are kept alive here until they report back
+_running_workers = set()
+
+def run_async(func, on_done, *args, on_fail=None):
+  worker = CliWorker(func, *args)
+  worker.signals.finished.connect(on_done)
+  if on_fail is not None:
+    worker.signals.failed.connect(on_fail)
+  worker.signals.finished.connect(lambda _: _running_workers.discard(worker))
+  worker.signals.failed.connect(lambda _: _running_workers.discard(worker))
+  _running_workers.add(worker)
+  QThreadPool.globalInstance().start(worker)
+
+# Used to run the independent queries of a refresh side by side
+_fanout = ThreadPoolExecutor(max_workers=3)
+
+class AsyncCli(QObject):
+  """Runs commands with QProcess, results are delivered by the event loop."""
+  def run(self, cmd: list[str], on_ok, on_err=None) -> QProcess:
+    process = QProcess(self)
+    output = bytearray()
+    process.readyReadStandardOutput.connect(
+      lambda: output.extend(process.readAllStandardOutput().data()))
+    def finished(exitCode, exitStatus):
+      process.deleteLater()
+      if exitStatus == QProcess.ExitStatus.NormalExit and exitCode == 0:
+        on_ok(bytes(output))
+      elif on_err is not None:
+        error = process.readAllStandardError().data() or bytes(output)
+        on_err(error.decode().strip())
+    def failed(error):
+      # finished is never emitted if the program couldn't be started
+      if error == QProcess.ProcessError.FailedToStart:
+        process.deleteLater()
+        if on_err is not None:
+          on_err(process.errorString())
+    process.finished.connect(finished)
+    process.errorOccurred.connect(failed)
+    process.start(cmd[0], cmd[1:])
+    return process
+
+def fetch_networks():
+  serviceFuture = _fanout.submit(get_service_status)
+  statusFuture = _fanout.submit(get_status)
+  networksFuture = _fanout.submit(get_networks_info)
+  serviceStatus = serviceFuture.result()
+  status = statusFuture.result()
+  networkData = networksFuture.result()
+  # Interface states come from sysfs, cheap enough to read afterwards
+  states = {
+    network["portDeviceName"]: get_interface_state(network["portDeviceName"])
+    for network in networkData
+  }
+  return serviceStatus, status, networkData, states
+
+def save_snapshot(result):
+  # Only a cache, failing to write it isn't worth bothering the user
+  try:
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(STATE_FILE + ".tmp", "wb") as stateFile:
+      stateFile.write(json_dumps(result))
+    os.replace(STATE_FILE + ".tmp", STATE_FILE)
+  except OSError:
+    pass
+
+def load_snapshot():
+  try:
+    if time() - os.path.getmtime(STATE_FILE) > STATE_MAX_AGE:
+      return None
+    with open(STATE_FILE, "rb") as stateFile:
+      status, networkData, states = json_loads(stateFile.read())
+  except (OSError, ValueError, TypeError):
+    return None
+  if not (isinstance(status, dict) and isinstance(networkData, list) and isinstance(states, dict)):
+    return None
+  return status, networkData, states
+
 # ============ DIALOGS =====================
+# Foreground of rows whose interface is down
+_GRAY_BRUSH = QBrush(QColor(128, 128, 128))
+_icons = {}
+
+def icon(name: str) -> QIcon:
+  # Theme lookups hit the disk, so resolve each icon only once
+  if name not in _icons:
+    _icons[name] = QIcon.fromTheme(name)
+  return _icons[name]
+
 def about_window():
+  run_async(
+    get_status,
+    lambda status: show_about(status["version"]),
+    on_fail=lambda _: show_about("unknown"),
+  )
+
+def show_about(version: str):
   QMessageBox.about(
       None,
       "About",
       f"""
-      <b>ZeroTier Version {get_status()[3]}<br>
+      <b>ZeroTier Version {version}<br>
       {QApplication.applicationDisplayName()} Version {QApplication.applicationVersion()}</b><br>
       Qt front-end for ZeroTier One<br>
       Created by Vsevolod «Damglador» Stopchanskyi<br>
@@ -290,11 +612,15 @@ def about_window():
       """
   )
 
-def networkinfo(networkIndex: int, parent: QWidget=None): # pyright: ignore[reportArgumentType]
+def mk_label(text: str) -> QLabel:
+  label = QLabel(text)
+  label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
+  return label
+
+def networkinfo(currentNetworkInfo: dict, parent: QWidget=None): # pyright: ignore[reportArgumentType]
   dlg = QDialog(parent)
   dlg.setWindowTitle("Network Info")
   layout = QFormLayout(dlg)
-  currentNetworkInfo = get_networks_info()[networkIndex]
 
   allowDefault  = QCheckBox(dlg)
   allowGlobal   = QCheckBox(dlg)
@@ -315,32 +641,27 @@ def networkinfo(networkIndex: int, parent: QWidget=None): # pyright: ignore[repo
   allowDNS.stateChanged.connect(
     lambda state: change_config(currentNetworkInfo["id"], "allowDNS", allowDNS.isChecked()))
 
-  layout.addRow(QLabel("Name:"), QLabel(currentNetworkInfo["name"]))
-  layout.addRow(QLabel("Network ID:"), QLabel(currentNetworkInfo["id"]))
-  try:
-    # first widget
-    layout.addRow(QLabel("Assigned Addresses:"), QLabel(currentNetworkInfo["assignedAddresses"][0]))
-
-    # subsequent widgets
-    for address in currentNetworkInfo["assignedAddresses"][1:]:
-      layout.addRow("", QLabel(address))
-  except IndexError:
-    layout.addRow(QLabel("Assigned Addresses:"), QLabel("-"))
-  layout.addRow(QLabel("Status:"), QLabel(currentNetworkInfo["status"]))
-  layout.addRow(QLabel("State:"), QLabel(get_interface_state(currentNetworkInfo["portDeviceName"])))
-  layout.addRow(QLabel("Type:"), QLabel(currentNetworkInfo["type"]))
-  layout.addRow(QLabel("Device:"), QLabel(currentNetworkInfo["portDeviceName"]))
-  layout.addRow(QLabel("Bridge:"), QLabel("True" if currentNetworkInfo["bridge"] else "False"))
-  layout.addRow(QLabel("MAC Address:"), QLabel(currentNetworkInfo["mac"]))
-  layout.addRow(QLabel("MTU:"), QLabel(str(currentNetworkInfo["mtu"])))
-  layout.addRow(QLabel("DHCP:"), QLabel("True" if currentNetworkInfo["dhcp"] else "False"))
-  layout.addRow(QLabel("Default Route:"), allowDefault)
-  layout.addRow(QLabel("Global IP:"), allowGlobal)
-  layout.addRow(QLabel("Managed IP:"), allowManaged)
-  layout.addRow(QLabel("DNS Configuration:"), allowDNS)
-  for label in dlg.findChildren(QLabel):
-    label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
-    # label.setStyleSheet("font-size: 16px")
+  addresses = currentNetworkInfo["assignedAddresses"] or ["-"]
+  rows = [
+    (mk_label("Name:"), mk_label(currentNetworkInfo["name"])),
+    (mk_label("Network ID:"), mk_label(currentNetworkInfo["id"])),
+    (mk_label("Assigned Addresses:"), mk_label(addresses[0])),
+    *[(mk_label(""), mk_label(address)) for address in addresses[1:]],
+    (mk_label("Status:"), mk_label(currentNetworkInfo["status"])),
+    (mk_label("State:"), mk_label(get_interface_state(currentNetworkInfo["portDeviceName"]))),
+    (mk_label("Type:"), mk_label(currentNetworkInfo["type"])),
+    (mk_label("Device:"), mk_label(currentNetworkInfo["portDeviceName"])),
+    (mk_label("Bridge:"), mk_label("True" if currentNetworkInfo["bridge"] else "False")),
+    (mk_label("MAC Address:"), mk_label(currentNetworkInfo["mac"])),
+    (mk_label("MTU:"), mk_label(str(currentNetworkInfo["mtu"]))),
+    (mk_label("DHCP:"), mk_label("True" if currentNetworkInfo["dhcp"] else "False")),
+    (mk_label("Default Route:"), allowDefault),
+    (mk_label("Global IP:"), allowGlobal),
+    (mk_label("Managed IP:"), allowManaged),
+    (mk_label("DNS Configuration:"), allowDNS),
+  ]
+  for row in rows:
+    layout.addRow(*row)
 
   dlg.setLayout(layout)
   dlg.adjustSize() # otherwise dialog will be a big square when resize is applied
@@ -361,11 +682,11 @@ class PeersList(QDialog):
 
     self.buttonBox = QDialogButtonBox()
     self.refreshBtn = self.buttonBox.addButton("Refresh", QDialogButtonBox.ButtonRole.ActionRole)
-    self.refreshBtn.setIcon(QIcon.fromTheme("view-refresh"))
+    self.refreshBtn.setIcon(icon("view-refresh"))
     self.refreshBtn.clicked.connect(self.refresh)
     self.pathsBtn = self.buttonBox.addButton("Show Paths", QDialogButtonBox.ButtonRole.ActionRole)
     self.pathsBtn.setToolTip("Show paths for the selected peer")
-    self.pathsBtn.setIcon(QIcon.fromTheme("show-all-effects"))
+    self.pathsBtn.setIcon(icon("show-all-effects"))
     self.pathsBtn.clicked.connect(self.peerpaths)
     self.closeBtn = self.buttonBox.addButton(QDialogButtonBox.StandardButton.Close)
     self.closeBtn.clicked.connect(self.close)
@@ -374,31 +695,37 @@ class PeersList(QDialog):
     layout.addWidget(self.buttonBox)
     self.setLayout(layout)
     self.refresh()
-    self.setMinimumWidth(     int(self.table.header().length() + 100)      )
-    self.setMinimumHeight(min(int(self.table.header().height() + 100), 300))
   def refresh(self):
-    # outputs info of peers in json format
-    peersData = get_peers_info()
+    run_async(get_peers_info, self.show_peers, on_fail=self.show_error)
+  def show_peers(self, peersData: list):
     # get peers information in a list of tuples
-    peers = []
-    for peerPosition in range(len(peersData)):
-      peers.append(
-        (
-          str(peersData[peerPosition]["address"]),
-          str(peersData[peerPosition]["version"]).replace("-1.-1.-1", "-"),
-          str(peersData[peerPosition]["role"]),
-          str(peersData[peerPosition]["latency"]),
-        )
+    peers = [
+      (
+        str(peer["address"]),
+        str(peer["version"]).replace("-1.-1.-1", "-"),
+        str(peer["role"]),
+        str(peer["latency"]),
       )
+      for peer in peersData
+    ]
     self.table.populate(peers)
+    self.fit_table()
+  def fit_table(self):
+    self.setMinimumWidth(     int(self.table.header().length() + 100)      )
+    self.setMinimumHeight(min(int(self.table.header().height() + 100), 300))
+  def show_error(self, message: str):
+    QMessageBox.warning(self, "Error", f'Failed to get peers: "{message}"')
   def peerpaths(self):
-    peerpaths = PeerPaths(peerIndex=self.table.indexOfTopLevelItem(self.table.currentItem()), parent=self)
+    peerAddress = self.table.current_key()
+    if peerAddress is None:
+      return
+    peerpaths = PeerPaths(peerAddress=peerAddress, parent=self)
     peerpaths.show()
 
 class PeerPaths(QDialog):
-  def __init__(self, peerIndex, parent: QWidget = None): # pyright: ignore
+  def __init__(self, peerAddress: str, parent: QWidget = None): # pyright: ignore
     super().__init__(parent)
-    self.peerIndex = peerIndex
+    self.peerAddress = peerAddress
     self.setWindowTitle("Peer Paths")
     columns = [
       "Address",
@@ -410,12 +737,11 @@ class PeerPaths(QDialog):
       "Trusted Path ID"
     ]
     self.table = Table(self, columns)
-    self.label = QLabel()
+    self.label = mk_label("")
     self.label.setStyleSheet("font-size: 14px; font-weight: bold;")
-    self.label.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
     self.buttonBox = QDialogButtonBox()
     self.refreshBtn = self.buttonBox.addButton("Refresh", QDialogButtonBox.ButtonRole.ActionRole)
-    self.refreshBtn.setIcon(QIcon.fromTheme("view-refresh"))
+    self.refreshBtn.setIcon(icon("view-refresh"))
     self.refreshBtn.clicked.connect(self.refresh)
     self.closeBtn = self.buttonBox.addButton(QDialogButtonBox.StandardButton.Close)
     self.closeBtn.clicked.connect(self.close)
@@ -425,36 +751,42 @@ class PeerPaths(QDialog):
     layout.addWidget(self.buttonBox)
     self.setLayout(layout)
     self.refresh()
-    self.setMinimumWidth(     int(self.table.header().length() + 100)      )
-    self.setMinimumHeight(min(int(self.table.header().height() + 100), 300))
   def refresh(self):
-    # get peers information in a list of tuples
-    paths = []
-    # outputs info of paths in json format
-    pathsData = get_peers_info()[self.peerIndex]["paths"]
-    label = f"Paths for peer {get_peers_info()[self.peerIndex]["address"]}"
+    label = f"Paths for peer {self.peerAddress}"
     self.label.setText(label)
     self.setWindowTitle(label)
+    run_async(get_peers_by_address, self.show_paths, on_fail=self.show_error)
+  def show_paths(self, peers: dict):
+    peer = peers.get(self.peerAddress)
+    # The peer may have gone away since the list was shown
+    pathsData = peer["paths"] if peer is not None else []
 
     # get paths information in a list of tuples
-    for pathPosition in range(len(pathsData)):
-      paths.append(
-        (
-          str(pathsData[pathPosition]["address"]),
-          str(pathsData[pathPosition]["active"]),
-          str(pathsData[pathPosition]["expired"]),
-          str(pathsData[pathPosition]["lastReceive"]),
-          str(pathsData[pathPosition]["lastSend"]),
-          str(pathsData[pathPosition]["preferred"]),
-          str(pathsData[pathPosition]["trustedPathId"]),
-        )
+    paths = [
+      (
+        str(path["address"]),
+        str(path["active"]),
+        str(path["expired"]),
+        str(path["lastReceive"]),
+        str(path["lastSend"]),
+        str(path["preferred"]),
+        str(path["trustedPathId"]),
       )
+      for path in pathsData
+    ]
     self.table.populate(paths)
+    self.fit_table()
+  def fit_table(self):
+    self.setMinimumWidth(     int(self.table.header().length() + 100)      )
+    self.setMinimumHeight(min(int(self.table.header().height() + 100), 300))
+  def show_error(self, message: str):
+    QMessageBox.warning(self, "Error", f'Failed to get peer paths: "{message}"')
 
 class Table(QTreeWidget):
   def __init__(self, parent, columns: list[str]):
     super().__init__(parent)
     self.columns = columns
+    self.content = None
     self.setColumnCount(len(columns))
     self.setHeaderLabels(columns)
 
@@ -468,7 +800,7 @@ class Table(QTreeWidget):
     # self.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectItems)
     copy_action = QAction(
       text="Copy",
-      icon=QIcon.fromTheme("edit-copy"),
+      icon=icon("edit-copy"),
       shortcut=QKeySequence(QKeySequence.StandardKey.Copy),
       parent=self
     )
@@ -478,16 +810,41 @@ class Table(QTreeWidget):
     self.addAction(copy_action)
     self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
 
-  def populate(self, content: list[list[str]]):
+  def populate(self, content: list[list[str]], disabled: list[bool] | None = None):
+    # Nothing to redo if the rows didn't change since the last refresh
+    if (content, disabled) == self.content:
+      return
+    self.content = (content, disabled)
+    items = [QTreeWidgetItem(row) for row in content]
+    # Rows are identified by their first column (network ID, peer address...)
+    for item, row in zip(items, content):
+      item.setData(0, Qt.ItemDataRole.UserRole, row[0])
+    if disabled is not None:
+      columns = self.columnCount()
+      for item, isDown in zip(items, disabled):
+        if isDown:
+          for column in range(columns):
+            item.setForeground(column, _GRAY_BRUSH)
+    # Insert everything at once and only lay out the table afterwards
+    self.setUpdatesEnabled(False)
     self.clear()
-    for row in range(len(content)):
-      self.insertTopLevelItem(row, QTreeWidgetItem(content[row]))
+    self.addTopLevelItems(items)
     for i in range(self.columnCount()):
       self.resizeColumnToContents(i)
+    self.setUpdatesEnabled(True)
+
+  def current_key(self) -> str | None:
+    item = self.currentItem()
+    if item is None:
+      return None
+    return item.data(0, Qt.ItemDataRole.UserRole)
 
 class MainWindow(QMainWindow):
   def __init__(self):
     super().__init__()
+    self.networksById = {}
+    self.serviceStatus = None
+    self.cli = AsyncCli(self)
     mainLayout = QVBoxLayout()
     centralWidget = QWidget()
     centralWidget.setLayout(mainLayout)
@@ -502,7 +859,7 @@ class MainWindow(QMainWindow):
     self.joinTextBox.returnPressed.connect(self.call_join_network)
     topSubLayout.addWidget(self.joinTextBox)
     joinBtn = QPushButton()
-    joinBtn.setIcon(QIcon.fromTheme("dialog-ok"))
+    joinBtn.setIcon(icon("dialog-ok"))
     joinBtn.setToolTip("Join")
     joinBtn.clicked.connect(self.call_join_network)
     topSubLayout.addWidget(joinBtn)
@@ -518,24 +875,24 @@ class MainWindow(QMainWindow):
     mainLayout.addLayout(bottomSubLayout)
 
     peersBtn = QPushButton("Show Peers")
-    peersBtn.setIcon(QIcon.fromTheme("show-all-effects"))
+    peersBtn.setIcon(icon("show-all-effects"))
     peersBtn.clicked.connect(self.call_peerslist)
     topSubLayout.addWidget(peersBtn)
 
     refreshBtn = QPushButton("Refresh")
-    refreshBtn.setIcon(QIcon.fromTheme("view-refresh"))
+    refreshBtn.setIcon(icon("view-refresh"))
     refreshBtn.setToolTip("Refresh networks list")
     refreshBtn.clicked.connect(self.refresh_networks)
     topSubLayout.addWidget(refreshBtn)
 
     aboutBtn = QPushButton("About")
-    aboutBtn.setIcon(QIcon.fromTheme("help-about"))
+    aboutBtn.setIcon(icon("help-about"))
     aboutBtn.clicked.connect(about_window)
     topSubLayout.addWidget(aboutBtn)
 
     leaveAction = QAction(
       text="Leave Network",
-      icon=QIcon.fromTheme("application-exit-symbolic"),
+      icon=icon("application-exit-symbolic"),
       parent=self.networksTable)
     leaveAction.triggered.connect(self.call_leave_network)
     self.networksTable.addAction(leaveAction)
@@ -543,7 +900,7 @@ class MainWindow(QMainWindow):
     toggleAction = QAction(
       # I would like to make text and icon dynamic, but Idk how
       text="Toggle Interface",
-      icon=QIcon.fromTheme("adjustlevels"), # media-playlist-shuffle
+      icon=icon("adjustlevels"), # media-playlist-shuffle
       parent=self.networksTable
     )
     toggleAction.triggered.connect(self.call_toggle_interface)
@@ -551,7 +908,7 @@ class MainWindow(QMainWindow):
 
     infoAction = QAction(
       text="Info",
-      icon=QIcon.fromTheme("help-info"),
+      icon=icon("help-info"),
       parent=self.networksTable
     )
     infoAction.triggered.connect(lambda: self.call_networkinfo())
@@ -578,42 +935,78 @@ class MainWindow(QMainWindow):
     #       the issue is old central and new central have seperate networks,
     #       so it needs to know which belongs where
     oldcentralBtn = QPushButton("Old Central")
-    oldcentralBtn.setIcon(QIcon.fromTheme("zerotier-central-old"))
+    oldcentralBtn.setIcon(icon("zerotier-central-old"))
     oldcentralBtn.setToolTip("Open ZeroTier Legacy Central in your browser")
     oldcentralBtn.clicked.connect(lambda: QDesktopServices.openUrl("https://my.zerotier.com"))
     bottomSubLayout.addWidget(oldcentralBtn)
     newcentralBtn = QPushButton("New Central")
-    newcentralBtn.setIcon(QIcon.fromTheme("zerotier-central-new"))
+    newcentralBtn.setIcon(icon("zerotier-central-new"))
     newcentralBtn.setToolTip("Open ZeroTier New Central in your browser")
     newcentralBtn.clicked.connect(lambda: QDesktopServices.openUrl("https://central.zerotier.com"))
     bottomSubLayout.addWidget(newcentralBtn)
 
+    self.watch_links()
+
+    # Show the last known networks until the live refresh comes back
+    snapshot = load_snapshot()
+    if snapshot is not None:
+      try:
+        self.show_networks((None, *snapshot))
+      except (ValueError, KeyError, TypeError):
+        # Entries from an older or damaged cache, the live refresh replaces them
+        self.networksById = {}
     self.refresh_networks()
 
   def call_networkinfo(self):
-    networkinfo(self.networksTable.indexOfTopLevelItem(self.networksTable.currentItem()))
+    networkId = self.networksTable.current_key()
+    if networkId is None:
+      return
+    # Go through the cached getter rather than the last table refresh:
+    # it's reused within a refresh but cleared after a config change
+    def on_done(networkData):
+      networkInfo = next((network for network in networkData if network["nwid"] == networkId), None)
+      if networkInfo is not None:
+        networkinfo(networkInfo)
+    run_async(get_networks_info, on_done, on_fail=self.statusLabel.setText)
 
   def start_stop_service(self):
-    status = get_service_status()
+    # The last shown status is what the user acted upon
+    status = self.serviceStatus or get_service_status()
     if status["ActiveState"] == "active":
-      manage_service("stop")
+      action = "stop"
     else:
       print("Starting service")
-      manage_service("start")
-    self.update_service_status()
+      action = "start"
+    self.run_service_action(action)
     return
   def enable_disable_service(self):
-    status = get_service_status()
+    status = self.serviceStatus or get_service_status()
     if status["UnitFileState"] == "enabled":
       print("Disabling service")
-      manage_service("disable")
+      action = "disable"
     else:
       print("Enabling service")
-      manage_service("enable")
-    self.update_service_status()
+      action = "enable"
+    self.run_service_action(action)
     return
-  def update_service_status(self):
-    status = get_service_status()
+  def run_service_action(self, action: str):
+    def on_done(_):
+      cache_clear()
+      self.update_service_status()
+    def on_fail(message):
+      service_error(message)
+      on_done(None)
+    self.cli.run(["systemctl", action, "zerotier-one"], on_done, on_fail)
+  def update_service_status(self, status: dict | None = None):
+    if status is not None:
+      self.show_service_status(status)
+      return
+    self.cli.run(
+      SERVICE_STATUS_CMD,
+      lambda output: self.show_service_status(parse_service_status(output.decode()))
+    )
+  def show_service_status(self, status: dict):
+    self.serviceStatus = status
     # Set checkbox state
     if status["UnitFileState"] == "enabled":
       self.serviceCheckBox.setChecked(True)
@@ -623,62 +1016,158 @@ class MainWindow(QMainWindow):
       self.serviceCheckBox.setToolTip("Enable ZeroTier Service")
     # Set button state
     if status["ActiveState"] == "active":
-      self.serviceBtn.setIcon(QIcon.fromTheme("media-playback-pause"))
+      self.serviceBtn.setIcon(icon("media-playback-pause"))
       self.serviceBtn.setToolTip("Stop ZeroTier Service")
     else:
-      self.serviceBtn.setIcon(QIcon.fromTheme("media-playback-start"))
+      self.serviceBtn.setIcon(icon("media-playback-start"))
       self.serviceBtn.setToolTip("Start ZeroTier Service")
   def call_peerslist(self):
     peerslist = PeersList(self)
     peerslist.show()
 
+  # pkexec and the service calls can take a while, so the actions run on the
+  # thread pool and the table is refreshed once they report back
   def call_toggle_interface(self):
-    if toggle_interface(self.networksTable.currentItem().text(3)):
-      self.refresh_networks()
+    item = self.networksTable.currentItem()
+    if item is None:
+      return
+    def on_done(_):
+      # The link monitor picks up the change by itself
+      if self.linkNotifier is None:
+        self.refresh_networks()
+    # A cancelled pkexec prompt isn't an error worth reporting
+    run_async(toggle_interface, on_done, item.text(3))
   def call_leave_network(self):
-    if leave_network(self.networksTable.currentItem().text(0), self.networksTable.currentItem().text(1)):
-      self.refresh_networks()
+    item = self.networksTable.currentItem()
+    if item is None:
+      return
+    networkId, networkName = item.text(0), item.text(1)
+    answer = QMessageBox.question(
+      None,
+      "Leave Network",
+      f"Are you sure you want to "
+      f'leave "{networkName}"\n(ID: {networkId})?',
+    )
+    if answer != QMessageBox.StandardButton.Yes:
+      return
+    # Always refresh, a network that never got configured has no interface to report
+    run_async(
+      leave_network, lambda _: self.refresh_networks(), networkId,
+      on_fail=lambda _: QMessageBox.warning(
+        None,
+        QApplication.applicationDisplayName(),
+        "Failed to leave network.",
+      )
+    )
   def call_join_network(self):
-    # Refresh networks only if join was successful
-    if join_network(self.joinTextBox.text()):
-      self.refresh_networks()
+    networkId = self.joinTextBox.text()
+    def on_done(joined):
+      if not joined:
+        QMessageBox.information(
+          None,
+          QApplication.applicationDisplayName(),
+          "You are already a member of this network.",
+        )
+        return
+      # Refresh networks only if join was successful
       self.joinTextBox.clear()
-      QTimer.singleShot(1000, self.refresh_networks)
-      QTimer.singleShot(5000, self.refresh_networks)
+      # The network is listed right away, show its row now
+      self.refresh_networks()
+      # Then wait for the configuration status, not the link: denied, unknown
+      # or unauthorized networks and ones without managed IPs never touch it
+      self.wait_for_network(networkId)
+    run_async(
+      join_network, on_done, networkId,
+      on_fail=lambda _: QMessageBox.warning(
+        None,
+        QApplication.applicationDisplayName(),
+        "Invalid network ID",
+      )
+    )
+
+  def watch_links(self):
+    # Refresh on kernel interface/address events instead of polling,
+    # a join or toggle produces a burst of them so they are debounced
+    self.linkSocket = open_link_monitor()
+    if self.linkSocket is None:
+      self.linkNotifier = None
+      return
+    self.linkTimer = QTimer(self, singleShot=True, interval=200)
+    self.linkTimer.timeout.connect(self.refresh_networks)
+    self.linkNotifier = QSocketNotifier(self.linkSocket.fileno(), QSocketNotifier.Type.Read, self)
+    self.linkNotifier.activated.connect(self.link_changed)
+
+  def link_changed(self):
+    names = read_link_events(self.linkSocket) # pyright: ignore[reportArgumentType]
+    if names is not None:
+      # Only ZeroTier interfaces matter, "zt" covers taps we haven't listed yet
+      known = {network["portDeviceName"] for network in self.networksById.values()}
+      if not any(name in known or name.startswith("zt") for name in names):
+        return
+    cache_clear()
+    self.linkTimer.start()
+
+  def wait_for_network(self, networkId: str, interval: int = 250, timeout: int = 5000):
+    # Poll the cheap (cached) network list on the thread pool and refresh the
+    # table again once the joined network got past requesting its configuration
+    timer = QTimer(self)
+    timer.setInterval(interval)
+    deadline = monotonic() + timeout / 1000
+    done = False
+    pending = False
+    def finish():
+      nonlocal done
+      if done:
+        return
+      done = True
+      timer.stop()
+      timer.deleteLater()
+      self.refresh_networks()
+    def checked(settled):
+      nonlocal pending
+      pending = False
+      if settled:
+        finish()
+    def check():
+      nonlocal pending
+      if monotonic() >= deadline:
+        finish()
+        return
+      if pending:
+        return
+      pending = True
+      # If the service can't be asked, stop waiting and let the refresh report it
+      run_async(is_network_settled, checked, networkId, on_fail=lambda _: checked(True))
+    timer.timeout.connect(check)
+    timer.start()
 
   def refresh_networks(self):
-    status = get_status()
-    self.statusLabel.setText(f"Your ID: {status[2]} Status: {status[4]}")
+    run_async(fetch_networks, self.networks_fetched, on_fail=self.statusLabel.setText)
+
+  def networks_fetched(self, result):
+    self.show_networks(result)
+    # The service status is always queried live, so it's left out
+    save_snapshot(result[1:])
 
-    self.networksTable.clear()
-    networks = []
-    # outputs info of networks in json format
-    networkData = get_networks_info()
+  def show_networks(self, result):
+    serviceStatus, status, networkData, states = result
+    if serviceStatus is not None:
+      self.update_service_status(serviceStatus)
+    self.networksById = {network["nwid"]: network for network in networkData}
+    self.statusLabel.setText(f"Your ID: {status['address']} Status: {get_online_status(status)}")
 
     # gets networks information in a list of tuples
-    for networkPosition in range(len(networkData)):
-      interfaceState = get_interface_state(
-        networkData[networkPosition]["portDeviceName"]
-      )
-      isDown: bool = interfaceState.lower() == "down"
-      networks.append(
-        (
-          str(networkData[networkPosition]["id"]),
-          str(networkData[networkPosition]["name"] if networkData[networkPosition]["name"] else "Unknown Name"),
-          str(networkData[networkPosition]["status"]),
-          str(networkData[networkPosition]["portDeviceName"]),
-          isDown,
-        )
+    networks = [
+      (
+        str(network["id"]),
+        str(network["name"] if network["name"] else "Unknown Name"),
+        str(network["status"]),
+        str(network["portDeviceName"]),
       )
-    # Custom implementation of populate() to get rows disabled
-    for row in range(len(networks)):
-      # [:-1] prevents type errors from the last bool by not including it
-      self.networksTable.insertTopLevelItem(row, QTreeWidgetItem(networks[row][:-1]))
-      if networks[row][-1]:
-        for column in range(self.networksTable.columnCount()):
-          self.networksTable.topLevelItem(row).setForeground(column, QBrush(QColor("gray")))  # pyright: ignore[reportOptionalMemberAccess]
-    for i in range(self.networksTable.columnCount()):
-      self.networksTable.resizeColumnToContents(i)
+      for network in networkData
+    ]
+    disabled = [states[network["portDeviceName"]].lower() == "down" for network in networkData]
+    self.networksTable.populate(networks, disabled)
 
 if __name__ == "__main__":
   app = QApplication()
@@ -687,7 +1176,7 @@ if __name__ == "__main__":
   app.setApplicationDisplayName(APP_NAME)
   app.setApplicationVersion(APP_VERSION)
 
-  QApplication.setWindowIcon(QIcon.fromTheme(QApplication.applicationName()))
+  QApplication.setWindowIcon(icon(QApplication.applicationName()))
 
   # Check if zerotier-one is installed
   if shutil.which("zerotier-cli") is None:
@@ -718,11 +1207,11 @@ if __name__ == "__main__":
   setup_authtoken()
 
   try:
-    check_output(["zerotier-cli", f"-T{get_token()}", "listnetworks"], stderr=STDOUT)
-  # in case the command throws an error
-  except CalledProcessError as error:
+    ztclient.networks()
+  # in case the service rejects the request
+  except ZeroTierError as error:
     # Invalid authtoken
-    if b'401 listnetworks {}' in error.stdout:
+    if error.status == 401:
       answer = QMessageBox.question(
         None,
         "Access Denied",
@@ -735,21 +1224,21 @@ if __name__ == "__main__":
       else:
         os._exit(1)
     # Can't connect to the service
-    if error.returncode == 1:
+    if error.status is None:
       QMessageBox.critical(
         None,
         "Error",
-        "The service is active, but zerotier-cli can't connect to it.\n\n"
-        f"Command Output:\n {error.output.decode().strip()}",
+        f"The service is active, but {APP_NAME} can't connect to it.\n\n"
+        f"Error:\n {error.message}",
       )
       os._exit(1)
     QMessageBox.critical(
       None,
       "Error",
-      "zerotier-cli exited with an unknown error.\n\n"
-      f"Command Output:\n {error.output.decode().strip()}",
+      "The service returned an unknown error.\n\n"
+      f"Response:\n {error}",
     )
-    os._exit(error.returncode)
+    os._exit(1)
   signal.signal(signal.SIGINT, signal.SIG_DFL)
   mainwindow = MainWindow()
   mainwindow.show()